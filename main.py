@@ -1,23 +1,39 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+import orjson
+import uvicorn
 from fastapi import FastAPI, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from datetime import datetime, timedelta
+from enum import IntEnum
+from functools import lru_cache
 from pydantic import BaseModel
-from typing import Dict, List
+from typing import Dict, List, NamedTuple, TypedDict
 
-app = FastAPI(title="Aesthetic Study Timer")
+app = FastAPI(title="Aesthetic Study Timer", default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
 
 # Data models
-class Timer(BaseModel):
+class Timer(NamedTuple):
+    # Immutable; replaced wholesale on state.timer rather than mutated
     duration: int # duration in minutes
     start_time: datetime | None = None
     is_running: bool = False
+    end_monotonic: float | None = None # time.monotonic() deadline
 
-class StudySession(BaseModel):
+class StudySession(TypedDict):
+    # Stored and returned as-is, so no model is built per session
     start_time: datetime
-    end_time: datetime | None = None
+    end_time: datetime | None
     duration: int
-    completed: bool = False
+    completed: bool
 
-class Achievement(BaseModel):
+@dataclass(slots=True)
+class Achievement:
     id: str
     name: str
     description: str
@@ -27,18 +43,36 @@ class Achievement(BaseModel):
 
 class UserStats(BaseModel):
     total_study_time: int = 0 # in minutes
+    session_count: int = 0
     current_streak: int = 0
     longest_streak: int = 0
     last_study_date: datetime | None = None
-    achievements: Dict[str, Achievement] = {}
+    achievements_list: List[Achievement] = [] # indexed by AchIdx
+
+    @property
+    def achievements(self) -> Dict[str, Achievement]:
+        return {ach.id: ach for ach in self.achievements_list}
+
+class AchIdx(IntEnum):
+    FIRST = 0
+    THREE_DAY = 1
+    WEEK = 2
+    MASTER = 3
+
+@dataclass(slots=True)
+class _State:
+    timer: Timer
+    stats_cache: bytes | None = None # rendered /stats body, None when stale
 
 
 # In-memory storage
-active_timer = Timer(duration=25) # Default 25 min timer
-study_sessions: List[StudySession] = []
+state = _State(timer=Timer(duration=25)) # Default 25 min timer
+study_sessions: deque[StudySession] = deque(maxlen=1024) # most recent sessions only
 user_stats = UserStats()
+_monotonic = time.monotonic # bound once for the /timer/status hot path
+_stats_lock = asyncio.Lock() # serializes /timer/stop read-modify-write of user_stats
 
-# Achievement definitions
+# Achievement definitions (insertion order matches AchIdx)
 ACHIEVEMENTS = {
     "first_session": Achievement(
         id="first_session",
@@ -66,126 +100,163 @@ ACHIEVEMENTS = {
     )
 }
 
+# Pre-serialized static responses
+_ROOT_BYTES = orjson.dumps({"message": "Welcome to Aesthetic Study Timer!"})
+
 # Initialize user achievements
-user_stats.achievements = ACHIEVEMENTS.copy()
+user_stats.achievements_list = [replace(ach) for ach in ACHIEVEMENTS.values()]
 
-def update_streak():
+# Streak-gated achievements, sorted by the streak they require
+_STREAK_TRIGGERS = sorted([
+    (3, AchIdx.THREE_DAY),
+    (7, AchIdx.WEEK),
+    # Study master achievement (10 hours = 600 minutes )
+    (3, AchIdx.MASTER),
+], key=lambda t: t[0])
+
+def update_streak(now: datetime | None = None):
     """Update the user's study streak based on the last study date"""
-    today = datetime.now().date()
+    now = now or datetime.now()
+    last = user_stats.last_study_date
+    # No previous session counts as a broken streak
+    days_diff = (now.date() - last.date()).days if last else 2
 
-    if user_stats.last_study_date is None:
-        user_stats.current_streak = 1
-    else:
-        days_diff = (today - user_stats.last_study_date.date()).days
+    if days_diff == 0: # Already studied today
+        return
+    # Consecutive day extends the streak, anything else restarts it
+    user_stats.current_streak = user_stats.current_streak + 1 if days_diff == 1 else 1
 
-        if days_diff == 0: # Already studied today
-            return
-        elif days_diff == 1:  # Consecutive day
-            user_stats.current_streak += 1
-        else: # Streak broken
-            user_stats.current_streak = 1
+    if user_stats.current_streak > user_stats.longest_streak:
+        user_stats.longest_streak = user_stats.current_streak
+    user_stats.last_study_date = now
+    state.stats_cache = None
 
-    user_stats.longest_streak = max(user_stats.current_streak, user_stats.longest_streak)
-    user_stats.last_study_date = datetime.now()
+def _unlock(idx: AchIdx, now: datetime, unlocked_list: List[Achievement]):
+    """Mark an achievement as unlocked and record it in unlocked_list"""
+    achievement = user_stats.achievements_list[idx]
+    achievement.unlocked = True
+    achievement.unlocked_date = now
+    unlocked_list.append(achievement)
+    state.stats_cache = None
 
-def check_achievements() -> List[Achievement]:
+def check_achievements(now: datetime | None = None) -> List[Achievement]:
     """Check and update achievements, return newly unlocked ones"""
+    now = now or datetime.now()
+    achievements = user_stats.achievements_list
+    streak = user_stats.current_streak
     newly_unlocked = []
 
     # First session achievement
-    if len(study_sessions) == 1 and not user_stats.achievements["first_session"].unlocked:
-        user_stats.achievements["first_session"].unlocked = True
-        user_stats.achievements["first_session"].unlocked_date = datetime.now()
-        newly_unlocked.append(user_stats.achievements["first_session"])
-
-    # Streak achievements
-    if user_stats.current_streak >= 3 and not user_stats.achievements["three_day_streak"].unlocked:
-        user_stats.achievements["three_day_streak"].unlocked = True
-        user_stats.achievements["three_day_streak"].unlocked_date = datetime.now()
-        newly_unlocked.append(user_stats.achievements["three_day_streak"])
-
-    if user_stats.current_streak >= 7 and not user_stats.achievements["week_streak"].unlocked:
-        user_stats.achievements["week_streak"].unlocked = True
-        user_stats.achievements["week_streak"].unlocked_date = datetime.now()
-        newly_unlocked.append(user_stats.achievements["week_streak"])
+    if user_stats.session_count == 1 and not achievements[AchIdx.FIRST].unlocked:
+        _unlock(AchIdx.FIRST, now, newly_unlocked)
 
-    # Study master achievement (10 hours = 600 minutes )
-    if user_stats.current_streak >= 3 and not user_stats.achievements["study_master"].unlocked:
-        user_stats.achievements["study_master"].unlocked = True
-        user_stats.achievements["study_master"].unlocked_date = datetime.now()
-        newly_unlocked.append(user_stats.achievements["study_master"])
+    # Streak achievements, stopping at the first threshold not yet reached
+    for threshold, idx in _STREAK_TRIGGERS:
+        if streak < threshold:
+            break
+        if not achievements[idx].unlocked:
+            _unlock(idx, now, newly_unlocked)
 
     return newly_unlocked
 
+@lru_cache(maxsize=8192)
+def _fmt(sec: int) -> str:
+    """Format a whole number of seconds the way str(timedelta) does"""
+    return str(timedelta(seconds=sec))
+
 @app.get("/")
 async def root():
-    return{"message": "Welcome to Aesthetic Study Timer!"}
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
-@app.post("/timer/start")
+@app.post("/timer/start", response_model=None)
 async def start_timer(duration: int = 25):
     """Start a new study timer"""
-    global active_timer
-    active_timer = Timer(duration=duration, start_time=datetime.now(), is_running=True)
-    return active_timer
+    timer = Timer(
+        duration=duration,
+        start_time=datetime.now(),
+        is_running=True,
+        end_monotonic=_monotonic() + duration * 60
+    )
+    state.timer = timer
+    return ORJSONResponse(content={
+        "duration": timer.duration,
+        "start_time": timer.start_time,
+        "is_running": timer.is_running
+    })
 
 @app.get("/timer/status")
 async def get_timer_status():
     """Get current timer status"""
-    if not active_timer.is_running:
-        return {"status": "stopped", "remaining": 0}
+    timer = state.timer
+    if not timer.is_running:
+        return ORJSONResponse(content={"status": "stopped", "remaining": 0})
     
-    elapsed = datetime.now() - active_timer.start_time
-    remaining = timedelta(minutes=active_timer.duration) - elapsed
+    remaining = timer.end_monotonic - _monotonic()
 
-    if remaining.total_seconds() <= 0:
-        active_timer.is_running = False
-        return {"status": "completed", "remaining": 0}
+    if remaining <= 0:
+        state.timer = timer._replace(is_running=False)
+        return ORJSONResponse(content={"status": "completed", "remaining": 0})
     
-    return{
+    seconds = int(remaining)
+    return ORJSONResponse(content={
         "status": "running",
-        "remaining_seconds": int(remaining.total_seconds()),
-        "remaining_formatted": str(timedelta(seconds=int(remaining.total_seconds())))
-    }
+        "remaining_seconds": seconds,
+        "remaining_formatted": _fmt(seconds)
+    })
 
-@app.post("/timer/stop")
+@app.post("/timer/stop", response_model=None)
 async def stop_timer():
     """Stop the current timer and update achievements"""
-    global active_timer, user_stats
-    if not active_timer.is_running:
-        raise HTTPException(status_code=400, detail="Timer is not running")
-    
-    active_timer.is_running = False
-
-    # Record the study session
-    session = StudySession(
-        start_time=active_timer.start_time,
-        end_time=datetime.now(),
-        duration=active_timer.duration,
-        completed=True
-    )
-    study_sessions.append(session)
+    async with _stats_lock:
+        timer = state.timer
+        if not timer.is_running:
+            raise HTTPException(status_code=400, detail="Timer is not running")
+        
+        state.timer = timer._replace(is_running=False)
+        now = datetime.now()
 
-    # Update user stats
-    user_stats.total_study_time += session.duration
-    update_streak()
+        # Record the study session
+        session: StudySession = {
+            "start_time": timer.start_time,
+            "end_time": now,
+            "duration": timer.duration,
+            "completed": True
+        }
+        study_sessions.append(session)
 
-    # Check for new achievements
-    new_achievements = check_achievements()
+        # Update user stats
+        user_stats.session_count += 1
+        user_stats.total_study_time += timer.duration
+        state.stats_cache = None
+        update_streak(now)
 
-    return {
+        # Check for new achievements
+        new_achievements = check_achievements(now)
+
+    return ORJSONResponse(content={
         "message": "Timer stopped successfully",
         "session": session,
         "streak": user_stats.current_streak,
         "new_achievement": new_achievements
-    }
+    })
 
 @app.get("/stats")
 async def get_stats():
     """Get user statistics and achievements"""
-    return {
-        "total_study_time": user_stats.total_study_time,
-        "current_streak": user_stats.current_streak,
-        "longest_streak": user_stats.longest_streak,
-        "last_study_date": user_stats.last_study_date,
-        "achievement": [ach for ach in user_stats.achievements.values() if ach.unlocked]
-    }
\ No newline at end of file
+    if state.stats_cache is None:
+        state.stats_cache = orjson.dumps({
+            "total_study_time": user_stats.total_study_time,
+            "current_streak": user_stats.current_streak,
+            "longest_streak": user_stats.longest_streak,
+            "last_study_date": user_stats.last_study_date,
+            "achievement": [ach for ach in user_stats.achievements.values() if ach.unlocked]
+        })
+    return Response(content=state.stats_cache, media_type="application/json")
+
+if __name__ == "__main__":
+    # State lives in process memory, so serve from a single worker
+    uvicorn.run(
+        "main:app",
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )